@@ -9,14 +9,25 @@ Changes
 """
 from __future__ import annotations
 
-import json, random, tkinter as tk
+import atexit, heapq, json, os, random, tempfile, tkinter as tk
+from collections import deque
 from pathlib import Path
 from typing import Dict, List, Tuple
+try:
+    import orjson
+    def _dumps(d) -> bytes: return orjson.dumps(d,option=orjson.OPT_INDENT_2)
+    _loads=orjson.loads
+except ImportError:  # stdlib fallback
+    def _dumps(d) -> bytes: return json.dumps(d,indent=2).encode()
+    _loads=json.loads
 
 # ------------------ config -------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent
 SCORES   = BASE_DIR / "highscores.json"
 CELL, GRID_W, GRID_H, FPS = 20, 30, 20, 90
+TOP_N = 50  # leaderboard rows shown
+# canvas bbox of every cell, indexed [x][y]; the grid never changes size
+_COORDS = tuple(tuple((x*CELL,y*CELL,(x+1)*CELL,(y+1)*CELL) for y in range(GRID_H)) for x in range(GRID_W))
 
 BG, GRID_CLR = "#0a0a0a", "#111"
 HEAD_CLR, BODY_CLR, FOOD_CLR = "#39ff14", "#0b8b00", "#ff4136"
@@ -25,91 +36,160 @@ BTN_BG, BTN_FG, BTN_ACTIVE = "#222", "#39ff14", "#555555"
 # ------------------ persistence -------------------------------------------
 
 def _load() -> Dict[str,int]:
-    try: return json.loads(SCORES.read_text()) if SCORES.exists() else {}
+    try: return _loads(SCORES.read_bytes()) if SCORES.exists() else {}
     except Exception: return {}
 
-def _save(d:Dict[str,int]):
-    try: SCORES.write_text(json.dumps(d,indent=2))
-    except Exception: pass
+# scores are loaded once and written back lazily (window close / exit)
+_cache: Dict[str,int]|None=None
+_dirty=False
+_version=0  # bumped on every score change; keys the leaderboard cache
+
+def _scores() -> Dict[str,int]:
+    global _cache
+    if _cache is None: _cache=_load()
+    return _cache
+
+def _mark_dirty():
+    global _dirty,_version; _dirty=True; _version+=1
+
+def _file_mode(path:Path) -> int:
+    try: return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask=os.umask(0); os.umask(umask)
+        return 0o666 & ~umask
+
+def _flush():
+    global _dirty
+    if not _dirty or _cache is None: return
+    try: fd,tmp=tempfile.mkstemp(dir=SCORES.parent,prefix=".highscores.",suffix=".tmp")
+    except Exception: return
+    try:  # write-then-rename so a crash never leaves a half-written file
+        with os.fdopen(fd,"wb") as f: f.write(_dumps(_cache))
+        os.chmod(tmp,_file_mode(SCORES))  # mkstemp is 0600; keep the file's usual mode
+        os.replace(tmp,SCORES); _dirty=False
+    except Exception:
+        try: os.unlink(tmp)
+        except OSError: pass
+
+atexit.register(_flush)
 
 # ------------------ main class -------------------------------------------
 
 class SnakeGame:
     def __init__(self, user:str):
-        self.user=user; self.scores=_load(); self.score=tk.IntVar(value=0); self.game_over=False
+        self.user=user; self.scores=_scores(); self.score=0; self.game_over=False
         self.root=tk.Toplevel(bg=BG); self.root.title(f"Snake – {user}")
         self.canvas=tk.Canvas(self.root,width=CELL*GRID_W,height=CELL*GRID_H,bg=BG,highlightthickness=0)
         self.canvas.pack()
+        self.root.bind("<Destroy>",self._on_destroy)
         self.hud=tk.Label(self.root,fg=HEAD_CLR,bg=BG,font=("Consolas",14)); self.hud.pack(fill=tk.X)
-        self.overlay: tk.Frame|None=None
-        for k,d in {"<Up>":(0,-1),"<Down>":(0,1),"<Left>":(-1,0),"<Right>":(1,0)}.items():
-            self.root.bind(k,lambda e,dir=d:self._turn(*dir))
+        self.overlay: tk.Frame|None=None; self._after_id: str|None=None
+        self._top: Tuple[int,List[Tuple[str,int]]]|None=None
+        # static grid + pooled food/snake items; ticks only move/recolor them
+        self.grid_id=self._grid(); self.food_id=self._sq(0,0,FOOD_CLR); self.snake_ids: deque[int]=deque()
+        self.root.bind("<Up>",self._up); self.root.bind("<Down>",self._down)
+        self.root.bind("<Left>",self._left); self.root.bind("<Right>",self._right)
         self._reset()
 
     # ---------- helpers ---------------------------------------------------
     def _btn(self,txt,cmd):
         return tk.Button(self.overlay,text=txt,command=cmd,bg=BTN_BG,fg=BTN_FG,activebackground=BTN_ACTIVE,font=("Consolas",14),bd=0,padx=20,pady=5)
-    def _grid(self):
-        for x in range(0,GRID_W*CELL,CELL): self.canvas.create_line(x,0,x,GRID_H*CELL,fill=GRID_CLR)
-        for y in range(0,GRID_H*CELL,CELL): self.canvas.create_line(0,y,GRID_W*CELL,y,fill=GRID_CLR)
-    def _sq(self,x,y,c): self.canvas.create_rectangle(x*CELL,y*CELL,(x+1)*CELL,(y+1)*CELL,fill=c,outline="")
+    def _grid(self) -> int:
+        # one CELL×CELL tile with its top/left edge lit, replicated over the board by Tk's
+        # `image copy -to`; a few Tcl calls instead of one create_line per grid line
+        tile=tk.PhotoImage(width=CELL,height=CELL); tile.put(BG,to=(0,0,CELL,CELL))
+        tile.put(GRID_CLR,to=(0,0,CELL,1)); tile.put(GRID_CLR,to=(0,0,1,CELL))
+        self._grid_img=tk.PhotoImage(width=GRID_W*CELL,height=GRID_H*CELL)  # keep a ref or Tk drops it
+        self._grid_img.tk.call(str(self._grid_img),"copy",str(tile),"-to",0,0,GRID_W*CELL,GRID_H*CELL)
+        return self.canvas.create_image(0,0,anchor="nw",image=self._grid_img)
+    def _sq(self,x,y,c) -> int: return self.canvas.create_rectangle(*_COORDS[x][y],fill=c,outline="")
+    def _mv(self,item,x,y): self.canvas.coords(item,*_COORDS[x][y])
+    def _cancel_tick(self):
+        if self._after_id: self.root.after_cancel(self._after_id); self._after_id=None
+    def _on_destroy(self,e):
+        if e.widget is self.root: self._cancel_tick(); _flush()
 
     # ---------- lifecycle -------------------------------------------------
     def _reset(self):
         if self.overlay: self.overlay.destroy(); self.overlay=None
-        self.dir=(1,0); self.snake=[(GRID_W//2,GRID_H//2)]; self.food=self._food(); self.score.set(0); self.game_over=False
+        self._cancel_tick()
+        start=(GRID_W//2,GRID_H//2)
+        # free cells as list + index map so take/give/sample are all O(1);
+        # a cell is occupied by the snake exactly when it is missing from _free_idx
+        self._free=[(x,y) for x in range(GRID_W) for y in range(GRID_H) if (x,y)!=start]
+        self._free_idx={p:i for i,p in enumerate(self._free)}
+        self.dir=self._next_dir=(1,0); self.snake=deque([start]); self.food=self._food(); self.score=0; self.game_over=False
+        for item in self.snake_ids: self.canvas.delete(item)
+        self.snake_ids=deque([self._sq(*self.snake[0],HEAD_CLR)]); self._mv(self.food_id,*self.food)
         self._draw(); self._tick()
-    def _food(self):
-        while True:
-            p=(random.randrange(GRID_W),random.randrange(GRID_H))
-            if p not in self.snake: return p
+    def _food(self) -> Tuple[int,int]|None:
+        return random.choice(self._free) if self._free else None
+    def _take(self,p):
+        i=self._free_idx.pop(p); last=self._free.pop()
+        if last!=p: self._free[i]=last; self._free_idx[last]=i
+    def _give(self,p): self._free_idx[p]=len(self._free); self._free.append(p)
 
     # ---------- drawing ---------------------------------------------------
     def _draw(self):
-        self.canvas.delete("all"); self._grid(); self._sq(*self.food,FOOD_CLR)
-        for i,(x,y) in enumerate(self.snake): self._sq(x,y, HEAD_CLR if i==0 else BODY_CLR)
         best=self.scores.get(self.user,0)
-        self.hud.config(text=f"{self.user} Score: {self.score.get()}    Best: {best}")
+        self.hud.config(text=f"{self.user} Score: {self.score}    Best: {best}")
 
     # ---------- movement & tick ------------------------------------------
+    # turns are only queued; _tick commits them, so two quick keys can't reverse the snake
     def _turn(self,dx,dy):
         if (dx,dy)==(-self.dir[0],-self.dir[1]): return
-        self.dir=(dx,dy)
+        self._next_dir=(dx,dy)
+    def _up(self,_e): self._turn(0,-1)
+    def _down(self,_e): self._turn(0,1)
+    def _left(self,_e): self._turn(-1,0)
+    def _right(self,_e): self._turn(1,0)
 
     def _tick(self):
+        self._after_id=None
         if self.game_over: return
+        self.dir=self._next_dir
         hx,hy=self.snake[0]
         nx,ny=hx+self.dir[0],hy+self.dir[1]
         # Game over on wall collision or self-collision
-        if nx<0 or nx>=GRID_W or ny<0 or ny>=GRID_H or (nx,ny) in self.snake:
+        if nx<0 or nx>=GRID_W or ny<0 or ny>=GRID_H or (nx,ny) not in self._free_idx:
             return self._end()
-        self.snake.insert(0,(nx,ny))
+        self.snake.appendleft((nx,ny)); self._take((nx,ny)); self.canvas.itemconfig(self.snake_ids[0],fill=BODY_CLR)
         if (nx,ny)==self.food:
-            self.score.set(self.score.get()+1); self.food=self._food()
+            self.score+=1; self.snake_ids.appendleft(self._sq(nx,ny,HEAD_CLR))
+            self.food=self._food()
+            if self.food is None: self._draw(); return self._end()  # board full
+            self._mv(self.food_id,*self.food)
         else:
-            self.snake.pop()
-        self._draw(); self.root.after(FPS,self._tick)
+            # recycle the tail item as the new head instead of create/delete
+            tail_p=self.snake.pop(); self._give(tail_p); tail=self.snake_ids.pop()
+            self._mv(tail,nx,ny); self.canvas.itemconfig(tail,fill=HEAD_CLR); self.snake_ids.appendleft(tail)
+        self._draw(); self._after_id=self.root.after(FPS,self._tick)
 
     # ---------- game over & leaderboard ----------------------------------
     def _end(self):
-        self.game_over=True
-        if self.score.get()>self.scores.get(self.user,0):
-            self.scores[self.user]=self.score.get(); _save(self.scores)
+        self.game_over=True; self._cancel_tick()
+        if self.score>self.scores.get(self.user,0):
+            self.scores[self.user]=self.score; _mark_dirty()
         self._show_game_over()
 
     def _show_game_over(self):
         self.overlay=tk.Frame(self.root,bg="",highlightthickness=0)
         self.overlay.place(relx=0.5,rely=0.5,anchor="center")
-        sc,best=self.score.get(),self.scores.get(self.user,0)
+        sc,best=self.score,self.scores.get(self.user,0)
         tk.Label(self.overlay,text="GAME OVER",fg="#ff3333",bg=BG,font=("Consolas",24,"bold")).pack(pady=(0,10))
         tk.Label(self.overlay,text=f"{self.user} Score: {sc}   (Best: {best})",fg=BTN_FG,bg=BG,font=("Consolas",14)).pack(pady=(0,15))
         self._btn("Retry",self._reset).pack()
         self._btn("Leaderboard",self._leaderboard).pack(pady=(10,0))
 
+    def _top_scores(self) -> List[Tuple[str,int]]:
+        if self._top is None or self._top[0]!=_version:
+            self._top=(_version,heapq.nlargest(TOP_N,self.scores.items(),key=lambda kv: kv[1]))
+        return self._top[1]
+
     def _leaderboard(self):
         win=tk.Toplevel(self.root,bg=BG); win.title("Leaderboard")
         tk.Label(win,text="Top Scores",fg=HEAD_CLR,bg=BG,font=("Consolas",18,"bold")).pack(pady=10)
-        for i,(u,s) in enumerate(sorted(self.scores.items(), key=lambda kv: kv[1], reverse=True),1):
+        for i,(u,s) in enumerate(self._top_scores(),1):
             clr=HEAD_CLR if u==self.user else "white"
             tk.Label(win,text=f"{i:>2}. {u:<20} {s}",fg=clr,bg=BG,font=("Consolas",12)).pack(anchor="w",padx=20)
         tk.Button(win,text="Close",command=win.destroy,bg=BTN_BG,fg=BTN_FG,activebackground=BTN_ACTIVE).pack(pady=10)
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import hmac
 import importlib
 import json
+import os
 import random
 import string
 from pathlib import Path
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
-from cryptography.fernet import Fernet
+from tkinter import messagebox
+try:
+    import orjson
+    _dumps, _loads = orjson.dumps, orjson.loads
+except ImportError:  # stdlib fallback; json.loads accepts bytes too
+    def _dumps(obj) -> bytes: return json.dumps(obj).encode()
+    _loads = json.loads
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
 
 # ------------------------------ config ------------------------------------
 BASE_DIR = Path(__file__).resolve().parent
@@ -17,15 +29,20 @@ CRED_FILE = BASE_DIR / "credentials.enc"
 CODE_FILE = BASE_DIR / "ghost.py"
 KEY_FILE = BASE_DIR / "secret.key"
 
+# cryptography is imported on first use; its native backend dominates startup time
+@functools.lru_cache(maxsize=1)
 def _load_or_create_key() -> bytes:
     if KEY_FILE.exists():
         return KEY_FILE.read_bytes()
+    from cryptography.fernet import Fernet
     key = Fernet.generate_key()
     KEY_FILE.write_bytes(key)
     return key
 
-FERNET_KEY = _load_or_create_key()
-FERNET = Fernet(FERNET_KEY)
+@functools.lru_cache(maxsize=1)
+def _fernet() -> Fernet:
+    from cryptography.fernet import Fernet
+    return Fernet(_load_or_create_key())
 
 FONT = ("Consolas", 14)
 GREEN = "#00FF00"
@@ -33,27 +50,59 @@ GREEN = "#00FF00"
 
 # ------------------------------ helpers -----------------------------------
 
-def enc(data: bytes) -> bytes:    return FERNET.encrypt(data)
+def enc(data: bytes) -> bytes:    return _fernet().encrypt(data)
+
+def dec(data: bytes) -> bytes:    return _fernet().decrypt(data)
+
+# passwords are stored as salted scrypt hashes, never in plaintext
+def _hash_pw(pw: str, salt: bytes) -> bytes:
+    return hashlib.scrypt(pw.encode(), salt=salt, n=2**14, r=8, p=1)
+
+def _new_record(pw: str, is_admin: bool) -> Dict[str, Any]:
+    salt = os.urandom(16)
+    return {"salt": salt.hex(), "hash": _hash_pw(pw, salt).hex(), "is_admin": is_admin}
 
-def dec(data: bytes) -> bytes:    return FERNET.decrypt(data)
+def _check_pw(rec: Dict[str, Any], pw: str) -> bool:
+    if "hash" not in rec:  # record written before hashing was introduced
+        return hmac.compare_digest(str(rec.get("password", "")).encode(), pw.encode())
+    return hmac.compare_digest(bytes.fromhex(rec["hash"]), _hash_pw(pw, bytes.fromhex(rec["salt"])))
+
+# decrypted plaintext keyed by path → (mtime_ns, bytes); skips Fernet on unchanged files.
+# Bytes are immutable, so every caller gets a freshly parsed dict it can't leak back in.
+_json_cache: Dict[Path, Tuple[int, bytes]] = {}
 
 def read_json(path: Path, default: Dict[str, Any] | None = None):
-    try: return json.loads(dec(path.read_bytes()).decode()) if path.exists() else default or {}
+    try:
+        if not path.exists(): return default or {}
+        mtime = path.stat().st_mtime_ns
+        hit = _json_cache.get(path)
+        if hit is None or hit[0] != mtime:
+            hit = _json_cache[path] = (mtime, dec(path.read_bytes()))
+        return _loads(hit[1])
     except Exception: return default or {}
 
 def write_json(path: Path, obj: Dict[str, Any]):
-    try: path.write_bytes(enc(json.dumps(obj).encode()))
+    _json_cache.pop(path, None)
+    try:
+        raw = _dumps(obj)
+        path.write_bytes(enc(raw))
+        _json_cache[path] = (path.stat().st_mtime_ns, raw)  # we know the contents; no reread
     except Exception: messagebox.showerror("Disk Error", "Could not write credentials file.")
 
-
 class MatrixLoginApp:
     CHARS = string.ascii_letters + string.digits
     FONT_SIZE = 14
+    LINE_LEN = 80
 
     def __init__(self):
         self.user: str | None = None
         self.is_admin = False
         self._viewer_btn: tk.Button | None = None
+        self._anim_id: str | None = None
+        self._code_cache: str | None = None
+        self._code_win: tk.Toplevel | None = None
+        self._rng: Any = None  # numpy Generator, created on the first animation tick
+        self._chars_arr: Any = None
 
         self.root = tk.Tk()
         self.root.title("Matrix Login – Encrypted Admin / User")
@@ -63,14 +112,13 @@ class MatrixLoginApp:
         # matrix background ------------------------------------------------
         self.canvas = tk.Canvas(self.root, bg="black", highlightthickness=0)
         self.canvas.place(relwidth=1, relheight=1)
+        self.root.bind("<Destroy>", self._on_destroy)
         line_h = self.FONT_SIZE + 4
-        rows = int(self.root.winfo_screenheight() / line_h)
-        self.matrix_items = [
-            self.canvas.create_text(10, i*line_h, anchor="nw",
-                                     text=self._rand_line(), font=("Courier", self.FONT_SIZE), fill=GREEN)
-            for i in range(rows)
-        ]
-        self._animate()
+        self._matrix_rows = int(self.root.winfo_screenheight() / line_h)
+        # all rows live in one multi-line item: a frame is a single itemconfig
+        self._matrix_item = self.canvas.create_text(10, 0, anchor="nw", text=self._rand_block(),
+                                                    font=("Courier", self.FONT_SIZE), fill=GREEN)
+        self._anim_id = self.root.after(100, self._animate)
 
         # UI --------------------------------------------------------------
         self._build_ui()
@@ -96,13 +144,32 @@ class MatrixLoginApp:
         self.status = self._label(frame, "", font=("Arial", 14)); self.status.pack(pady=10)
 
     # --------------------- matrix animation -----------------------------
-    def _rand_line(self):
-        return "".join(random.choices(self.CHARS, k=80))
+    def _init_rng(self):
+        # numpy costs ~65 ms to import, so it is loaded once the window is already up
+        import numpy as np
+        self._rng = np.random.default_rng()
+        self._chars_arr = np.frombuffer(self.CHARS.encode(), dtype=np.uint8)
+
+    def _rand_lines(self, n: int) -> List[str]:
+        if self._rng is None:  # first frame, before numpy is loaded
+            return ["".join(random.choices(self.CHARS, k=self.LINE_LEN)) for _ in range(n)]
+        # one vectorised draw for all n rows instead of n random.choices calls
+        idx = self._rng.integers(0, len(self._chars_arr), size=(n, self.LINE_LEN), dtype=self._chars_arr.dtype)
+        buf = self._chars_arr[idx].tobytes().decode("ascii")
+        return [buf[i*self.LINE_LEN:(i+1)*self.LINE_LEN] for i in range(n)]
+
+    def _rand_block(self) -> str:
+        return "\n".join(self._rand_lines(self._matrix_rows))
 
     def _animate(self):
-        for item in self.matrix_items:
-            self.canvas.itemconfig(item, text=self._rand_line())
-        self.root.after(100, self._animate)
+        if self._rng is None: self._init_rng()
+        self.canvas.itemconfig(self._matrix_item, text=self._rand_block())
+        self._anim_id = self.root.after(100, self._animate)
+
+    def _on_destroy(self, event):
+        # stop the rain with the window so no callback fires into a dead interpreter
+        if event.widget is self.root and self._anim_id:
+            self.root.after_cancel(self._anim_id); self._anim_id = None
 
     # --------------------- credential I/O --------------------------------
     @staticmethod
@@ -115,20 +182,22 @@ class MatrixLoginApp:
         if not user or not pw: return messagebox.showerror("Error", "Username and password required.")
         creds = self._cred_dict()
         if not creds:  # first user → admin
-            creds[user] = {"password": pw, "is_admin": True}
+            creds[user] = _new_record(pw, True)
             write_json(CRED_FILE, creds)
             return messagebox.showinfo("Success", f"Admin account created for {user}!")
         if not self.is_admin: return messagebox.showerror("Denied", "Only admin can add users.")
         if user in creds: return messagebox.showwarning("Exists", "Username already taken.")
-        creds[user] = {"password": pw, "is_admin": False}
+        creds[user] = _new_record(pw, False)
         write_json(CRED_FILE, creds)
         messagebox.showinfo("Success", f"User '{user}' created.")
 
     def login(self):
         user, pw = self.ent_user.get().strip(), self.ent_pass.get().strip()
         creds = self._cred_dict()
-        if user in creds and creds[user]["password"] == pw:
+        if user in creds and _check_pw(creds[user], pw):
             self.user, self.is_admin = user, bool(creds[user]["is_admin"])
+            if "hash" not in creds[user]:  # upgrade plaintext record on first good login
+                creds[user] = _new_record(pw, self.is_admin); write_json(CRED_FILE, creds)
             messagebox.showinfo("Login", f"Welcome {user}!")
             self.status.config(text="Login Successful")
             self._launch_game()
@@ -152,12 +221,20 @@ class MatrixLoginApp:
         self._viewer_btn.place(relx=1, rely=1, anchor="se", x=-10, y=-10)
 
     def _show_code(self):
-        if not CODE_FILE.exists():
-            return messagebox.showerror("Missing", "ghost.py not found")
+        # the viewer is built once and only hidden on close, so reopening is free
+        if self._code_win is not None and self._code_win.winfo_exists():
+            self._code_win.deiconify(); self._code_win.lift()
+            return
+        if self._code_cache is None:
+            if not CODE_FILE.exists():
+                return messagebox.showerror("Missing", "ghost.py not found")
+            self._code_cache = CODE_FILE.read_text(encoding="utf-8")
+        from tkinter import scrolledtext  # only needed once the viewer is opened
         win = tk.Toplevel(self.root, bg="black"); win.title("ghost.py")
-        code = CODE_FILE.read_text(encoding="utf-8")
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)
         st = scrolledtext.ScrolledText(win, wrap=tk.NONE, bg="#111", fg="#0f0", insertbackground="#0f0")
-        st.insert(tk.END, code); st.config(state=tk.DISABLED); st.pack(fill=tk.BOTH, expand=True)
+        st.insert(tk.END, self._code_cache); st.config(state=tk.DISABLED); st.pack(fill=tk.BOTH, expand=True)
+        self._code_win = win
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 import os
+import tempfile
 import unittest
+from collections import deque
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -8,12 +10,17 @@ import sys
 mock_tkinter = MagicMock()
 sys.modules['tkinter'] = mock_tkinter
 
-from main import _load_or_create_key
+import main
+from main import _load_or_create_key, _fernet, read_json, write_json, _new_record, _check_pw
+import ghost
 from ghost import SnakeGame
 
 class TestApp(unittest.TestCase):
 
     def setUp(self):
+        # Drop the cached key so each test sees the key file on disk
+        _load_or_create_key.cache_clear()
+        _fernet.cache_clear()
         # Clean up created files before each test
         if Path("secret.key").exists():
             Path("secret.key").unlink()
@@ -44,19 +51,153 @@ class TestApp(unittest.TestCase):
         key = _load_or_create_key()
         self.assertEqual(key, key_content)
 
+    def test_key_is_cached(self):
+        """Test that the key file is only read once per process."""
+        key = _load_or_create_key()
+        Path("secret.key").unlink()
+        self.assertEqual(_load_or_create_key(), key)
+        self.assertIs(_fernet(), _fernet())
+
+    def test_json_roundtrip(self):
+        """Test that encrypted JSON reads back what was written, including after a rewrite."""
+        path = Path("credentials.enc")
+        write_json(path, {"alice": {"password": "pw", "is_admin": True}})
+        self.assertEqual(read_json(path), {"alice": {"password": "pw", "is_admin": True}})
+        write_json(path, {"bob": {"password": "pw2", "is_admin": False}})
+        self.assertEqual(read_json(path), {"bob": {"password": "pw2", "is_admin": False}})
+
+    def test_json_cache_skips_decrypt(self):
+        """Test that reads after a write, or of an unchanged file, don't decrypt again."""
+        path = Path("credentials.enc")
+        write_json(path, {"alice": {"is_admin": True}})
+        with patch.object(main, "dec", wraps=main.dec) as dec:
+            self.assertEqual(read_json(path), {"alice": {"is_admin": True}})
+            read_json(path)["bob"] = {}  # callers get a copy
+            self.assertEqual(read_json(path), {"alice": {"is_admin": True}})
+            dec.assert_not_called()
+
+    def test_json_cache_isolates_nested_records(self):
+        """Test that editing a record in place without writing doesn't change later reads."""
+        path = Path("credentials.enc")
+        written = {"alice": {"is_admin": False}}
+        write_json(path, written)
+        written["alice"]["is_admin"] = True
+        creds = read_json(path)
+        creds["alice"]["is_admin"] = True
+        self.assertEqual(read_json(path), {"alice": {"is_admin": False}})
+
+    def test_password_hashing(self):
+        """Test that stored records hold a salted hash and verify only the right password."""
+        rec = _new_record("hunter2", False)
+        self.assertNotIn("password", rec)
+        self.assertNotIn("hunter2", str(rec))
+        self.assertTrue(_check_pw(rec, "hunter2"))
+        self.assertFalse(_check_pw(rec, "hunter3"))
+        self.assertNotEqual(rec["salt"], _new_record("hunter2", False)["salt"])
+        self.assertTrue(_check_pw({"password": "old", "is_admin": True}, "old"))
+
     def test_snake_self_collision(self):
         """Test that the game ends on self-collision."""
-        # Configure the mock to return an integer for the score
-        mock_tkinter.IntVar.return_value.get.return_value = 0
-
         game = SnakeGame(user="testuser")
         # Position the snake so that it will collide with itself on the next tick
-        game.snake = [(5, 5), (4, 5), (3, 5)]
-        game.dir = (-1, 0) # Move left, next position is (4,5) which is a collision
+        game.snake = deque([(5, 5), (4, 5), (3, 5)])
+        for cell in game.snake:
+            if cell in game._free_idx:
+                game._take(cell)
+        game.dir = game._next_dir = (-1, 0) # Move left, next position is (4,5) which is a collision
 
         game._tick()
         self.assertTrue(game.game_over)
 
+    def test_tick_reuses_canvas_items(self):
+        """Test that a plain move recycles the tail item instead of redrawing."""
+        game = SnakeGame(user="testuser")
+        game.food = (0, 0)
+        game.canvas.reset_mock()
+
+        game._tick()
+        game.canvas.delete.assert_not_called()
+        game.canvas.create_rectangle.assert_not_called()
+        game.canvas.create_line.assert_not_called()
+        self.assertEqual(len(game.snake_ids), len(game.snake))
+
+    def test_food_never_spawns_on_snake(self):
+        """Test that the free-cell pool stays the exact complement of the snake."""
+        game = SnakeGame(user="testuser")
+        hx, hy = game.snake[0]
+        game.food = (hx + 1, hy)  # eat on the first tick
+        for _ in range(3):
+            game._tick()
+        self.assertEqual(len(game.snake), 2)
+        self.assertNotIn(game.food, game.snake)
+        self.assertTrue(set(game._free).isdisjoint(game.snake))
+        self.assertEqual(len(game._free) + len(game.snake), 30 * 20)
+        self.assertEqual({p: i for i, p in enumerate(game._free)}, game._free_idx)
+
+    def test_scores_flushed_only_when_dirty(self):
+        """Test that highscores are written once on flush and not at all when clean."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(ghost, "SCORES", Path(tmp) / "highscores.json"), \
+                patch.object(ghost, "_cache", {}), patch.object(ghost, "_dirty", False):
+            ghost._flush()
+            self.assertFalse(ghost.SCORES.exists())
+            ghost._scores()["testuser"] = 7
+            ghost._mark_dirty()
+            ghost._flush()
+            self.assertEqual(ghost._load(), {"testuser": 7})
+            self.assertFalse(ghost._dirty)
+            self.assertEqual(os.listdir(tmp), ["highscores.json"])
+
+    def test_flush_keeps_file_mode(self):
+        """Test that the atomic rewrite doesn't narrow highscores.json to owner-only."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(ghost, "SCORES", Path(tmp) / "highscores.json"), \
+                patch.object(ghost, "_cache", {}), patch.object(ghost, "_dirty", False):
+            umask = os.umask(0o022)
+            try:
+                ghost._mark_dirty()
+                ghost._flush()
+                self.assertEqual(ghost.SCORES.stat().st_mode & 0o777, 0o644)
+                os.chmod(ghost.SCORES, 0o640)
+                ghost._mark_dirty()
+                ghost._flush()
+                self.assertEqual(ghost.SCORES.stat().st_mode & 0o777, 0o640)
+            finally:
+                os.umask(umask)
+
+    def test_top_scores_cached_until_score_change(self):
+        """Test that the leaderboard is ranked, capped and rebuilt only after a new score."""
+        scores = {f"user{i}": i for i in range(ghost.TOP_N + 10)}
+        with patch.object(ghost, "_cache", scores), patch.object(ghost, "_dirty", False):
+            game = SnakeGame(user="testuser")
+            top = game._top_scores()
+            self.assertEqual(len(top), ghost.TOP_N)
+            self.assertEqual(top[0], (f"user{ghost.TOP_N + 9}", ghost.TOP_N + 9))
+            self.assertIs(game._top_scores(), top)
+            scores["testuser"] = 1000
+            ghost._mark_dirty()
+            self.assertEqual(game._top_scores()[0], ("testuser", 1000))
+
+    def test_quick_turns_cannot_reverse(self):
+        """Test that two keypresses within one tick can't turn the snake back on itself."""
+        game = SnakeGame(user="testuser")
+        game.food = (0, 0)
+        self.assertEqual(game.dir, (1, 0))
+        game._up(None)
+        game._left(None)  # reverse of the committed direction, ignored
+        game._tick()
+        self.assertEqual(game.dir, (0, -1))
+        self.assertFalse(game.game_over)
+
+    def test_reset_cancels_pending_tick(self):
+        """Test that retrying never leaves two tick chains running."""
+        game = SnakeGame(user="testuser")
+        pending = game._after_id
+        self.assertIsNotNone(pending)
+        game.root.after_cancel.reset_mock()
+        game._reset()
+        game.root.after_cancel.assert_called_once_with(pending)
+
 
 if __name__ == '__main__':
     unittest.main()